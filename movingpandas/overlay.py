@@ -1,57 +1,77 @@
 # -*- coding: utf-8 -*-
 
+import numpy as np
 import pandas as pd
-from shapely.geometry import Point, LineString, shape
-from shapely.affinity import translate
-from datetime import datetime, timedelta
-
+import shapely
+from geopandas import GeoDataFrame
+from shapely.geometry import shape
 from .time_range_utils import TemporalRange, SpatioTemporalRange
 
+TOLERANCE_NS = 10000000  # 10 milliseconds, cf. is_equal
+
+
+def _spatiotemporal_ref_vectorized(df):
+    """
+    Yields SpatioTemporalRanges for the input rows' spatial_intersection
+    LineStrings (in row order) by interpolating timestamps.
 
-def _get_spatiotemporal_ref(row):
-    """
-    Returns the SpatioTemporalRange for the input row's spatial_intersection
-    LineString by interpolating timestamps.
-    """
-    if row["spatial_intersection"].is_empty:
-        return None
-    if type(row["spatial_intersection"]) == LineString:
-        pt0 = Point(row["spatial_intersection"].coords[0])
-        ptn = Point(row["spatial_intersection"].coords[-1])
-        t = row["prev_t"]
-        t_delta = row["t"] - t
-        length = row["line"].length
-        t0 = t + (t_delta * row["line"].project(pt0) / length)
-        tn = t + (t_delta * row["line"].project(ptn) / length)
-        # to avoid numerical issues with microseconds beyond six digits,
-        # we reconstruct the timestamps
-        t0 = datetime(
-            t0.year, t0.month, t0.day, t0.hour, t0.minute, t0.second, t0.microsecond
+    Vectorized replacement for per-row SpatioTemporalRange construction:
+    coordinates, projections, and timestamps are computed on columnar
+    arrays instead of row by row.
+    """
+    if len(df) == 0:
+        return
+    intersections = np.asarray(df["spatial_intersection"].values, dtype=object)
+    is_line = (shapely.get_type_id(intersections) == 1) & ~shapely.is_empty(
+        intersections
+    )
+    if not is_line.any():
+        return
+    (line_idx,) = is_line.nonzero()
+    intersections = intersections[line_idx]
+    lines = np.asarray(df["line"].values, dtype=object)[line_idx]
+    pts0 = shapely.get_point(intersections, 0)
+    ptsn = shapely.get_point(intersections, -1)
+    lengths = shapely.length(lines)
+    proj0 = shapely.line_locate_point(lines, pts0)
+    projn = shapely.line_locate_point(lines, ptsn)
+    prev_t_ns = df["prev_t"].values[line_idx].astype("datetime64[ns]").view(np.int64)
+    t_ns = df["t"].values[line_idx].astype("datetime64[ns]").view(np.int64)
+    delta_ns = (t_ns - prev_t_ns).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t0_ns = prev_t_ns + np.where(lengths > 0, delta_ns * proj0 / lengths, 0).astype(
+            np.int64
         )
-        tn = datetime(
-            tn.year, tn.month, tn.day, tn.hour, tn.minute, tn.second, tn.microsecond
+        tn_ns = prev_t_ns + np.where(lengths > 0, delta_ns * projn / lengths, 0).astype(
+            np.int64
         )
-        # to avoid intersection issues with zero length lines
-        if ptn == translate(pt0, 0.00000001, 0.00000001):
-            t0 = row["prev_t"]
-            tn = row["t"]
-        # to avoid numerical issues with timestamps
-        if is_equal(tn, row["t"]):
-            tn = row["t"]
-        if is_equal(t0, row["prev_t"]):
-            t0 = row["prev_t"]
-        return SpatioTemporalRange(pt0, ptn, t0, tn)
-    else:
-        return None
+    # to avoid intersection issues with zero length lines (which
+    # _connect_prev_pt_and_geometry nudges by 0.00000001)
+    coords0 = shapely.get_coordinates(pts0)
+    coordsn = shapely.get_coordinates(ptsn)
+    zero_length = (np.abs(coordsn - coords0) <= 0.00000001).all(axis=1)
+    # to avoid numerical issues with timestamps
+    snap_t0 = zero_length | (np.abs(t0_ns - prev_t_ns) < TOLERANCE_NS)
+    snap_tn = zero_length | (np.abs(tn_ns - t_ns) < TOLERANCE_NS)
+    # truncate interpolated timestamps to microsecond precision to avoid
+    # numerical issues with microseconds beyond six digits, then convert
+    # all of them to datetimes in one pass
+    t0s = pd.to_datetime(
+        np.where(snap_t0, prev_t_ns, t0_ns // 1000 * 1000)
+    ).to_pydatetime()
+    tns = pd.to_datetime(np.where(snap_tn, t_ns, tn_ns // 1000 * 1000)).to_pydatetime()
+    for i in range(len(line_idx)):
+        yield SpatioTemporalRange(pts0[i], ptsn[i], t0s[i], tns[i])
 
 
 def _dissolve_ranges(ranges):
     """
     SpatioTemporalRanges that touch (i.e. the end of one equals the start of
     another) are dissolved (aka. merged).
+
+    Consumes any iterable (e.g. a generator) of ranges so that no
+    intermediate list has to be materialized.
     """
-    if len(ranges) == 0:
-        raise ValueError("Nothing to dissolve (received empty ranges)!")
     dissolved_ranges = []
     new_range = None
     for r in ranges:
@@ -67,6 +87,8 @@ def _dissolve_ranges(ranges):
         else:
             dissolved_ranges.append(new_range)
             new_range = SpatioTemporalRange(r.pt_0, r.pt_n, r.t_0, r.t_n)
+    if new_range is None:
+        raise ValueError("Nothing to dissolve (received empty ranges)!")
     dissolved_ranges.append(new_range)
     return dissolved_ranges
 
@@ -74,15 +96,33 @@ def _dissolve_ranges(ranges):
 def is_equal(t1, t2):
     """
     Similar timestamps are considered equal to avoid numerical issues.
+
+    Thin wrapper over int64 nanosecond subtraction; no timedelta objects
+    are created in the comparison.
     """
-    if type(t2) == pd.Timestamp:
-        td = abs(t1 - t2.tz_localize(t1.tzinfo).to_pydatetime())
-    else:
-        td = abs(t1 - t2)
-    return td < timedelta(milliseconds=10)
+    t1 = pd.Timestamp(t1)
+    t2 = pd.Timestamp(t2)
+    if t1.tzinfo != t2.tzinfo:
+        t2 = t2.tz_localize(None).tz_localize(t1.tzinfo)
+    return abs(t1.value - t2.value) < TOLERANCE_NS
+
+
+def _bbox_overlap(bounds1, bounds2):
+    """
+    Check whether two (minx, miny, maxx, maxy) bounding boxes overlap.
+    """
+    return (
+        bounds1[0] <= bounds2[2]
+        and bounds1[2] >= bounds2[0]
+        and bounds1[1] <= bounds2[3]
+        and bounds1[3] >= bounds2[1]
+    )
 
 
 def intersects(traj, polygon):
+    # disjoint bounding boxes rule out an intersection without asking GEOS
+    if not _bbox_overlap(traj._get_cached_bounds(), polygon.bounds):
+        return False
     try:
         line = traj.to_linestring()
     except:  # noqa: E722
@@ -94,37 +134,54 @@ def create_entry_and_exit_points(traj, range):
     """
     Returns a dataframe with inserted entry and exit points according to the
     provided SpatioTemporalRange.
+
+    The new rows take their attributes from the previous row (= pad) and
+    are placed via index search and preallocated numpy inserts instead of
+    copying and re-sorting the whole dataframe.
     """
-    if type(range) != SpatioTemporalRange:
+    if not isinstance(range, SpatioTemporalRange):
         raise TypeError("Input range has to be a SpatioTemporalRange!")
-    # Create row at entry point with attributes from previous row = pad
-    row0 = traj.df.iloc[traj.df.index.get_loc(range.t_0, method="pad")].copy()
-    row0["geometry"] = range.pt_0
-    # Create row at exit point
-    rown = traj.df.iloc[traj.df.index.get_loc(range.t_n, method="pad")].copy()
-    rown["geometry"] = range.pt_n
-    # Insert rows
-    temp_df = traj.df.copy()
-
-    try:
-        temp_df.loc[range.t_0] = row0
-    except ValueError as err:
-        if str(err) == "cannot set a single element with an array":
-            # fix for https://github.com/anitagraser/movingpandas/issues/118
-            # (not sure what causes this problem)
-            pass
+    df = traj.df
+    index = df.index
+    geom_col_name = df.geometry.name
+    geom_values = np.asarray(df[geom_col_name].values, dtype=object)
+    ts = pd.DatetimeIndex([range.t_0, range.t_n])
+    # single batched lookup instead of two get_loc calls;
+    # pad hits the timestamp itself if it is present in the index
+    pad_positions = index.get_indexer(ts, method="pad")
+    if (pad_positions < 0).any():
+        raise KeyError(f"Range start {range.t_0} lies before the trajectory start!")
+    inserts = []  # tuples of (insert position, pad position, timestamp, point)
+    overwrites = []  # tuples of (position, point) for existing timestamps
+    for t, pt, pad_pos in zip(ts, (range.pt_0, range.pt_n), pad_positions):
+        if index[pad_pos] == t:
+            overwrites.append((pad_pos, pt))
         else:
-            raise err
-
-    try:
-        temp_df.loc[range.t_n] = rown
-    except ValueError as err:
-        if str(err) == "cannot set a single element with an array":
-            pass
+            # attributes are taken from the previous row = pad
+            inserts.append((pad_pos + 1, pad_pos, t, pt))
+    if len(inserts) == 2 and inserts[0][2] == inserts[1][2]:
+        # degenerate range: keep a single row at the shared timestamp
+        inserts = [inserts[1]]
+    if overwrites:
+        geom_values = geom_values.copy()
+        for pos, pt in overwrites:
+            geom_values[pos] = pt
+    positions = np.asarray([i[0] for i in inserts], dtype=np.int64)
+    pad_positions = np.asarray([i[1] for i in inserts], dtype=np.int64)
+    new_times = np.array([i[2] for i in inserts], dtype="datetime64[ns]")
+    new_index = pd.DatetimeIndex(
+        np.insert(index.values, positions, new_times), name=index.name
+    )
+    data = {}
+    for col in df.columns:
+        if col == geom_col_name:
+            new_pts = np.empty(len(inserts), dtype=object)
+            new_pts[:] = [i[3] for i in inserts]
+            data[col] = np.insert(geom_values, positions, new_pts)
         else:
-            raise err
-
-    return temp_df.sort_index()
+            values = df[col].values
+            data[col] = np.insert(values, positions, values[pad_positions])
+    return GeoDataFrame(data, index=new_index, geometry=geom_col_name, crs=df.crs)
 
 
 def _get_segments_for_ranges(traj, ranges):
@@ -132,7 +189,7 @@ def _get_segments_for_ranges(traj, ranges):
     segments = []  # list of trajectories
     for the_range in ranges:
         temp_traj = traj.copy()
-        if type(the_range) == SpatioTemporalRange:
+        if isinstance(the_range, SpatioTemporalRange):
             temp_traj.df = create_entry_and_exit_points(traj, the_range)
         try:
             segment = temp_traj.get_segment_between(the_range.t_0, the_range.t_n)
@@ -146,20 +203,24 @@ def _get_segments_for_ranges(traj, ranges):
 
 
 def _determine_time_ranges_pointbased(traj, polygon):
-    df = traj.df
-    df["t"] = df.index
-    df["intersects"] = df.intersects(polygon)
-    df["segment"] = (df["intersects"].shift(1) != df["intersects"]).astype(int).cumsum()
-    df = df.groupby("segment", as_index=False).agg(
-        {"t": ["min", "max"], "intersects": ["min"]}
-    )
-    df.columns = df.columns.map("_".join)
+    """
+    Returns list of TemporalRanges describing runs of consecutive
+    trajectory points that intersect the provided polygon.
 
-    ranges = []
-    for index, row in df.iterrows():
-        if row["intersects_min"]:
-            ranges.append(TemporalRange(row["t_min"], row["t_max"]))
-    return ranges
+    Runs are determined with a numpy run-length encoding of the
+    intersection mask instead of a shift/cumsum/groupby pass. The
+    trajectory's dataframe is left untouched.
+    """
+    mask = shapely.intersects(
+        np.asarray(traj.df.geometry.values, dtype=object), polygon
+    )
+    if not mask.any():
+        return []
+    index = traj.df.index
+    changes = np.flatnonzero(np.diff(mask.astype(np.int8))) + 1
+    starts = np.r_[0, changes]
+    ends = np.r_[changes, len(mask)] - 1
+    return [TemporalRange(index[s], index[e]) for s, e in zip(starts, ends) if mask[s]]
 
 
 def _get_potentially_intersecting_lines(traj, polygon):
@@ -172,14 +233,14 @@ def _get_potentially_intersecting_lines(traj, polygon):
     possible_matches : GeoDataFrame
         GeoDataFrame of potentially intersecting lines
     """
-    line_df = traj._to_line_df()
-    spatial_index = line_df.sindex
-    if spatial_index:
-        possible_matches_index = list(spatial_index.intersection(polygon.bounds))
-        possible_matches = line_df.iloc[possible_matches_index].sort_index()
-    else:
-        possible_matches = line_df
-    return possible_matches
+    line_df, spatial_index = traj._get_line_sindex()
+    if not _bbox_overlap(traj._get_cached_bounds(), polygon.bounds):
+        return line_df.iloc[[]]
+    # query returns array positions, which for _to_line_df() are already
+    # time-ordered, so an in-place sort replaces the sort_index() pass
+    possible_matches_index = spatial_index.query(polygon, predicate="intersects")
+    possible_matches_index.sort()
+    return line_df.take(possible_matches_index)
 
 
 def _determine_time_ranges_linebased(traj, polygon):
@@ -191,11 +252,12 @@ def _determine_time_ranges_linebased(traj, polygon):
     #       these will result in zero length lines that return an empty
     #       intersection.
     possible_matches = _get_potentially_intersecting_lines(traj, polygon)
-    possible_matches["spatial_intersection"] = possible_matches.intersection(polygon)
-    possible_matches["spatiotemporal_intersection"] = possible_matches.apply(
-        _get_spatiotemporal_ref, axis=1
+    # GEOS-batched intersection on the raw geometry array, assigned back
+    # as a plain object column to skip GeoSeries wrapping
+    possible_matches["spatial_intersection"] = shapely.intersection(
+        np.asarray(possible_matches.geometry.values, dtype=object), polygon
     )
-    ranges = possible_matches["spatiotemporal_intersection"]
+    ranges = _spatiotemporal_ref_vectorized(possible_matches)
     return _dissolve_ranges(ranges)
 
 
@@ -216,7 +278,7 @@ def _get_geometry_and_properties_from_feature(feature):
     """
     Provides convenience access to geometry and properties of a Shapely feature.
     """
-    if type(feature) != dict:
+    if not isinstance(feature, dict):
         raise TypeError("Trajectories can only be intersected with a Shapely feature!")
     try:
         geometry = shape(feature["geometry"])
@@ -239,3 +301,43 @@ def intersection(traj, feature, pointbased=False):
             clipping.df["intersecting_" + key] = value
         segments.append(clipping)
     return segments
+
+
+def intersection_many(traj, features):
+    """
+    Returns a list of trajectory segments that intersect the given features.
+    Resulting trajectories include the intersecting features' attributes.
+
+    All feature geometries are matched against the trajectory's line
+    segment spatial index in one bulk query, so the index is neither
+    rebuilt nor re-queried per feature.
+    """
+    geometries = []
+    properties = []
+    for feature in features:
+        geometry, props = _get_geometry_and_properties_from_feature(feature)
+        geometries.append(geometry)
+        properties.append(props)
+    line_df, spatial_index = traj._get_line_sindex()
+    feature_idx, tree_idx = spatial_index.query(
+        np.asarray(geometries, dtype=object), predicate="intersects"
+    )
+    segments = []
+    for i, (geometry, props) in enumerate(zip(geometries, properties)):
+        matches = tree_idx[feature_idx == i]
+        if len(matches) == 0:
+            continue
+        matches.sort()
+        possible_matches = line_df.take(matches)
+        possible_matches["spatial_intersection"] = shapely.intersection(
+            np.asarray(possible_matches.geometry.values, dtype=object), geometry
+        )
+        try:
+            ranges = _dissolve_ranges(_spatiotemporal_ref_vectorized(possible_matches))
+        except ValueError:  # only point intersections, nothing to dissolve
+            continue
+        for clipping in _get_segments_for_ranges(traj, ranges):
+            for key, value in props.items():
+                clipping.df["intersecting_" + key] = value
+            segments.append(clipping)
+    return segments
@@ -5,7 +5,7 @@ from pandas.util.testing import assert_frame_equal
 from shapely.geometry import Polygon
 from datetime import datetime, timedelta
 from movingpandas.tests.test_trajectory import Node, make_traj, CRS_METRIC, CRS_LATLON
-from movingpandas.overlay import _get_potentially_intersecting_lines
+from movingpandas.overlay import _get_potentially_intersecting_lines, intersection_many
 
 
 class TestOverlay:
@@ -152,6 +152,12 @@ class TestOverlay:
         traj.clip(polygon)
         assert_frame_equal(self.default_traj_metric_5.df, traj.df)
 
+    def test_clip_pointbased_does_not_alter_df(self):
+        polygon = Polygon([(5, -5), (7, -5), (7, 12), (5, 12), (5, -5)])
+        traj = self.default_traj_metric_5.copy()
+        traj.clip(polygon, point_based=True)
+        assert_frame_equal(self.default_traj_metric_5.df, traj.df)
+
     def test_clip_with_one_intersection_reversed(self):
         polygon = Polygon([(5, -5), (7, -5), (7, 5), (5, 5), (5, -5)])
         traj = make_traj([Node(10, 0), Node(6, 0, minute=10), Node(0, 0, minute=20)])
@@ -231,6 +237,34 @@ class TestOverlay:
         assert intersection.df.iloc[0]["intersecting_id"] == 1
         assert intersection.df.iloc[0]["intersecting_name"] == "foo"
 
+    def test_intersection_many(self):
+        features = [
+            {
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[(5, -5), (7, -5), (7, 12), (5, 12), (5, -5)]],
+                },
+                "properties": {"id": 1, "name": "foo"},
+            },
+            {
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [
+                        [(105, -5), (107, -5), (107, 12), (105, 12), (105, -5)]
+                    ],
+                },
+                "properties": {"id": 2, "name": "bar"},
+            },
+        ]
+        traj = self.default_traj_metric_5
+        segments = intersection_many(traj, features)
+        expected = traj.intersection(features[0]).trajectories
+        assert len(segments) == 2
+        assert segments[0] == expected[0]
+        assert segments[1] == expected[1]
+        assert segments[0].df.iloc[0]["intersecting_id"] == 1
+        assert segments[0].df.iloc[0]["intersecting_name"] == "foo"
+
     def test_clip_with_empty_spatial_intersection_linestrings(self):
         polygon = Polygon(
             [
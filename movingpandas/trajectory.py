@@ -2,6 +2,7 @@
 
 import warnings
 
+from shapely import STRtree
 from shapely.affinity import translate
 from shapely.geometry import Point, LineString
 from datetime import datetime
@@ -133,6 +134,32 @@ class Trajectory:
         except NameError:
             self.is_latlon = self.crs["init"] == from_epsg(4326)["init"]
 
+    @property
+    def df(self):
+        """
+        GeoDataFrame of the trajectory's points.
+
+        Assigning a new dataframe drops memoized results (line segments,
+        spatial index, bounds) derived from the old one. In-place column
+        mutations do not invalidate these caches directly but the line
+        segment cache is re-derived if the dataframe's columns or length
+        have changed.
+        """
+        return self._df
+
+    @df.setter
+    def df(self, df):
+        self._df = df
+        self._invalidate_caches()
+
+    def _invalidate_caches(self):
+        """
+        Drop memoized results derived from the trajectory's dataframe.
+        """
+        self._line_df_cache = None
+        self._line_sindex_cache = None
+        self._bounds_cache = None
+
     def __str__(self):
         try:
             line = self.to_linestring()
@@ -359,10 +386,11 @@ class Trajectory:
         -------
         GeoDataFrame
         """
-        line_gdf = self._to_line_df()
-        line_gdf.drop(columns=[self.get_geom_column_name(), "prev_pt"], inplace=True)
-        line_gdf.reset_index(drop=True, inplace=True)
-        line_gdf.rename(columns={"line": "geometry"}, inplace=True)
+        line_gdf = self._to_line_df().drop(
+            columns=[self.get_geom_column_name(), "prev_pt"]
+        )
+        line_gdf = line_gdf.reset_index(drop=True)
+        line_gdf = line_gdf.rename(columns={"line": "geometry"})
         return line_gdf
 
     def to_traj_gdf(self, wkt=False):
@@ -731,7 +759,7 @@ class Trajectory:
                 f"Trajectory already contains a {TRAJ_ID_COL_NAME} column! "
                 f"Use overwrite=True to overwrite exiting values."
             )
-        self.df[TRAJ_ID_COL_NAME] = self.id
+        self.df = self.df.assign(**{TRAJ_ID_COL_NAME: self.id})
 
     def add_direction(self, overwrite=False):
         """
@@ -904,7 +932,7 @@ class Trajectory:
         offset : int
             Number of seconds to shift by, can be positive or negative.
         """
-        self.df[column] = self.df[column].shift(offset, freq="1s")
+        self.df = self.df.assign(**{column: self.df[column].shift(offset, freq="1s")})
 
     def apply_offset_minutes(self, column, offset):
         """
@@ -917,24 +945,74 @@ class Trajectory:
         offset : int
             Number of minutes to shift by, can be positive or negative.
         """
-        self.df[column] = self.df[column].shift(offset, freq="1min")
+        self.df = self.df.assign(**{column: self.df[column].shift(offset, freq="1min")})
 
     def _to_line_df(self):
         """
         Convert trajectory data GeoDataFrame of points to GeoDataFrame of lines that
         connect consecutive points.
 
+        The result is memoized; assigning a new dataframe to the
+        trajectory drops the cache, and a changed column set or length
+        (e.g. from in-place column additions) triggers a re-derivation.
+
         Returns
         -------
         line_df : GeoDataFrame
             GeoDataFrame of line segements
         """
-        line_df = self.df.copy()
-        line_df["prev_pt"] = line_df.geometry.shift()
-        line_df["t"] = self.df.index
-        line_df["prev_t"] = line_df["t"].shift()
-        line_df["line"] = line_df.apply(self._connect_prev_pt_and_geometry, axis=1)
-        return line_df.set_geometry("line")[1:]
+        if self._line_df_cache is not None:
+            cached_cols = self._line_df_cache.columns.drop(
+                ["prev_pt", "t", "prev_t", "line"]
+            )
+            if len(self._line_df_cache) != len(self.df) - 1 or not cached_cols.equals(
+                self.df.columns
+            ):
+                self._invalidate_caches()
+        if self._line_df_cache is None:
+            line_df = self.df.copy()
+            line_df["prev_pt"] = line_df.geometry.shift()
+            line_df["t"] = self.df.index
+            line_df["prev_t"] = line_df["t"].shift()
+            line_df["line"] = line_df.apply(self._connect_prev_pt_and_geometry, axis=1)
+            self._line_df_cache = line_df.set_geometry("line")[1:]
+        return self._line_df_cache
+
+    def _get_cached_bounds(self):
+        """
+        Return the memoized (minx, miny, maxx, maxy) bounds of the
+        trajectory's points, e.g. for cheap bbox pretests in overlay
+        operations.
+
+        Returns
+        -------
+        tuple
+            Bounding box values (minx, miny, maxx, maxy)
+        """
+        if self._bounds_cache is None:
+            self._bounds_cache = tuple(self.df.total_bounds)
+        return self._bounds_cache
+
+    def _get_line_sindex(self):
+        """
+        Return the trajectory's line segment GeoDataFrame together with a
+        spatial index (STRtree) of the segments.
+
+        The result is memoized so that repeated overlay operations (e.g.
+        clipping against many polygons) build the segments and the tree
+        only once.
+
+        Returns
+        -------
+        line_df : GeoDataFrame
+            GeoDataFrame of line segments
+        sindex : shapely.STRtree
+            Spatial index of the line segments
+        """
+        if self._line_sindex_cache is None:
+            line_df = self._to_line_df()
+            self._line_sindex_cache = (line_df, STRtree(line_df.geometry.values))
+        return self._line_sindex_cache
 
     def get_mcp(self):
         """Return the Minimum Convex Polygon of the trajectory data
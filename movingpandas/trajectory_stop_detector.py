@@ -1,13 +1,182 @@
 # -*- coding: utf-8 -*-
 
+import numpy as np
+import shapely
+from math import radians, sin, cos, sqrt, asin
 from geopandas import GeoDataFrame
+from pandas import Timedelta
+
+try:
+    from numba import njit
+except ImportError:
+
+    def njit(*args, **kwargs):
+        def wrapper(func):
+            return func
+
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return wrapper
+
+
 from .trajectory import Trajectory
 from .trajectory_collection import TrajectoryCollection
-from .geometry_utils import mrr_diagonal
+from .geometry_utils import R_EARTH
 from .trajectory_utils import convert_time_ranges_to_segments
 from .time_range_utils import TemporalRangeWithTrajId
 
 
+@njit(cache=True)
+def _haversine(x1, y1, x2, y2):
+    """
+    Return the great-circle distance between two lon/lat points in meters.
+    """
+    lon1, lat1, lon2, lat2 = radians(x1), radians(y1), radians(x2), radians(y2)
+    a = (
+        sin((lat2 - lat1) / 2) ** 2
+        + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * R_EARTH * asin(sqrt(a))
+
+
+@njit(cache=True)
+def _window_is_stop(xs, ys, head, tail, max_diameter, is_latlon):
+    """
+    Check whether all points in the window [head, tail] lie within
+    max_diameter of each other. Squared euclidean distances are compared
+    against max_diameter**2 to avoid sqrt calls; for lat/lon coordinates
+    haversine distances are used.
+    """
+    max_diam2 = max_diameter * max_diameter
+    for i in range(head, tail + 1):
+        for j in range(i + 1, tail + 1):
+            if is_latlon:
+                if _haversine(xs[i], ys[i], xs[j], ys[j]) >= max_diameter:
+                    return False
+            else:
+                dx = xs[i] - xs[j]
+                dy = ys[i] - ys[j]
+                if dx * dx + dy * dy >= max_diam2:
+                    return False
+    return True
+
+
+@njit(cache=True)
+def _argminmax(arr, head, tail):
+    """
+    Return the indexes of the smallest and largest value in arr[head:tail+1].
+    """
+    imin = imax = head
+    for i in range(head + 1, tail + 1):
+        if arr[i] < arr[imin]:
+            imin = i
+        if arr[i] > arr[imax]:
+            imax = i
+    return imin, imax
+
+
+@njit(cache=True)
+def _stop_kernel(xs, ys, ts_ns, win_start, max_diameter, min_dur_ns, is_latlon):
+    """
+    Sliding-window stop detection on coordinate and int64 nanosecond
+    timestamp arrays. win_start holds, for each point, the first index
+    within min_duration of it (precomputed via searchsorted), so the
+    window head jumps there directly instead of being trimmed point by
+    point. Returns (starts, ends) int64 arrays holding the point indexes
+    of detected stop ranges.
+
+    The window's x/y extremes are maintained incrementally (O(1) on
+    append, rescans only when an extreme point drops out of the window).
+    If the points realizing the extremes are already further apart than
+    max_diameter, the window cannot be a stop and the exact pairwise
+    check is skipped.
+    """
+    n = len(xs)
+    starts = np.empty(n, np.int64)
+    ends = np.empty(n, np.int64)
+    count = 0
+    head = 0  # window is [head, i]
+    imin_x = imax_x = imin_y = imax_y = 0
+    is_stopped = False
+    previously_stopped = False
+    max_diam2 = max_diameter * max_diameter
+    for i in range(n):
+        if head == i:  # window starts fresh at the current point
+            imin_x = imax_x = imin_y = imax_y = i
+        else:
+            if xs[i] < xs[imin_x]:
+                imin_x = i
+            if xs[i] > xs[imax_x]:
+                imax_x = i
+            if ys[i] < ys[imin_y]:
+                imin_y = i
+            if ys[i] > ys[imax_y]:
+                imax_y = i
+        if not is_stopped:  # remove points to the specified min_duration
+            if i - head > 1 and win_start[i] > head:
+                head = min(win_start[i], i - 1)
+            if imin_x < head or imax_x < head:
+                imin_x, imax_x = _argminmax(xs, head, i)
+            if imin_y < head or imax_y < head:
+                imin_y, imax_y = _argminmax(ys, head, i)
+        if i > head:
+            # lower bound: distances between the extreme point pairs
+            if is_latlon:
+                might_stop = (
+                    _haversine(xs[imin_x], ys[imin_x], xs[imax_x], ys[imax_x])
+                    < max_diameter
+                    and _haversine(xs[imin_y], ys[imin_y], xs[imax_y], ys[imax_y])
+                    < max_diameter
+                )
+            else:
+                dx = xs[imax_x] - xs[imin_x]
+                dy = ys[imax_x] - ys[imin_x]
+                d2_x = dx * dx + dy * dy
+                dx = xs[imax_y] - xs[imin_y]
+                dy = ys[imax_y] - ys[imin_y]
+                d2_y = dx * dx + dy * dy
+                might_stop = d2_x < max_diam2 and d2_y < max_diam2
+            if not might_stop:
+                is_stopped = False  # an extreme pair already exceeds max_diameter
+            else:
+                # upper bound: the bbox diagonal caps all pairwise distances
+                if is_latlon:
+                    # combine the widest parallel's zonal span with the
+                    # meridional span (planar combination, fine for the
+                    # small boxes relevant to stop detection)
+                    if abs(ys[imin_y]) < abs(ys[imax_y]):
+                        lat_wide = ys[imin_y]
+                    else:
+                        lat_wide = ys[imax_y]
+                    zonal = _haversine(xs[imin_x], lat_wide, xs[imax_x], lat_wide)
+                    merid = _haversine(xs[imin_x], ys[imin_y], xs[imin_x], ys[imax_y])
+                    diag2 = zonal * zonal + merid * merid
+                else:
+                    bw = xs[imax_x] - xs[imin_x]
+                    bh = ys[imax_y] - ys[imin_y]
+                    diag2 = bw * bw + bh * bh
+                if diag2 < max_diam2:
+                    is_stopped = True  # definitely a stop, skip the exact check
+                else:
+                    is_stopped = _window_is_stop(
+                        xs, ys, head, i, max_diameter, is_latlon
+                    )
+        else:
+            is_stopped = False
+        if i > head and not is_stopped and previously_stopped:
+            if ts_ns[i - 1] - ts_ns[head] >= min_dur_ns:  # detected end of a stop
+                starts[count] = head
+                ends[count] = i - 1
+                count += 1
+                head = i + 1
+        previously_stopped = is_stopped
+    if is_stopped and head < n and ts_ns[n - 1] - ts_ns[head] >= min_dur_ns:
+        starts[count] = head
+        ends[count] = n - 1
+        count += 1
+    return starts[:count], ends[:count]
+
+
 class TrajectoryStopDetector:
     """
     Detects stops in a trajectory.
@@ -56,54 +225,31 @@ class TrajectoryStopDetector:
         return result
 
     def _process_traj(self, traj, max_diameter, min_duration):
-        detected_stops = []
-        segment_geoms = []
-        segment_times = []
-        is_stopped = False
-        previously_stopped = False
         geom_column_name = traj.get_geom_column_name()
-
-        for index, row in traj.df.iterrows():
-            segment_geoms.append(row[geom_column_name])
-            segment_times.append(index)
-
-            if not is_stopped:  # remove points to the specified min_duration
-                while (
-                    len(segment_geoms) > 2
-                    and segment_times[-1] - segment_times[0] >= min_duration
-                ):
-                    segment_geoms.pop(0)
-                    segment_times.pop(0)
-
-            if (
-                len(segment_geoms) > 1
-                and mrr_diagonal(segment_geoms, traj.is_latlon) < max_diameter
-            ):
-                is_stopped = True
-            else:
-                is_stopped = False
-
-            if len(segment_geoms) > 1:
-                segment_end = segment_times[-2]
-                segment_begin = segment_times[0]
-                if not is_stopped and previously_stopped:
-                    if (
-                        segment_end - segment_begin >= min_duration
-                    ):  # detected end of a stop
-                        detected_stops.append(
-                            TemporalRangeWithTrajId(segment_begin, segment_end, traj.id)
-                        )
-                        segment_geoms = []
-                        segment_times = []
-
-            previously_stopped = is_stopped
-
-        if is_stopped and segment_times[-1] - segment_times[0] >= min_duration:
-            detected_stops.append(
-                TemporalRangeWithTrajId(segment_times[0], segment_times[-1], traj.id)
-            )
-
-        return detected_stops
+        coords = shapely.get_coordinates(
+            np.asarray(traj.df[geom_column_name].values, dtype=object)
+        )
+        xs = np.ascontiguousarray(coords[:, 0])
+        ys = np.ascontiguousarray(coords[:, 1])
+        times = traj.df.index
+        ts_ns = times.values.astype("datetime64[ns]").view(np.int64)
+        min_dur_ns = Timedelta(min_duration).value
+        # first index within min_duration of each point
+        win_start = np.searchsorted(ts_ns, ts_ns - min_dur_ns, side="right")
+        starts, ends = _stop_kernel(
+            xs,
+            ys,
+            ts_ns,
+            win_start,
+            float(max_diameter),
+            min_dur_ns,
+            traj.is_latlon,
+        )
+        traj_id = traj.id
+        return [
+            TemporalRangeWithTrajId(times[s], times[e], traj_id)
+            for s, e in zip(starts, ends)
+        ]
 
     def get_stop_segments(self, max_diameter, min_duration):
         """
@@ -162,20 +308,24 @@ class TrajectoryStopDetector:
             convert_time_ranges_to_segments(self.traj, stop_time_ranges)
         )
 
-        stop_pts = GeoDataFrame(columns=["geometry"]).set_geometry("geometry")
-        stop_pts["stop_id"] = [track.id for track in stops.trajectories]
-        stop_pts = stop_pts.set_index("stop_id")
-
-        for stop in stops:
-            stop_pts.at[stop.id, "start_time"] = stop.get_start_time()
-            stop_pts.at[stop.id, "end_time"] = stop.get_end_time()
-            stop_pts.at[stop.id, "geometry"] = stop.get_start_location()
-            stop_pts.at[stop.id, "traj_id"] = stop.parent.id
-
-        if len(stops) > 0:
-            stop_pts["duration_s"] = (
-                stop_pts["end_time"] - stop_pts["start_time"]
-            ).dt.total_seconds()
-            stop_pts["traj_id"] = stop_pts["traj_id"].astype(type(stop.parent.id))
+        if len(stops) == 0:
+            stop_pts = GeoDataFrame(columns=["geometry"]).set_geometry("geometry")
+            stop_pts["stop_id"] = []
+            return stop_pts.set_index("stop_id")
 
+        stop_pts = GeoDataFrame(
+            {
+                "stop_id": [stop.id for stop in stops],
+                "start_time": [stop.get_start_time() for stop in stops],
+                "end_time": [stop.get_end_time() for stop in stops],
+                "geometry": [stop.get_start_location() for stop in stops],
+                "traj_id": [stop.parent.id for stop in stops],
+            },
+            geometry="geometry",
+        ).set_index("stop_id")
+        stop_pts["duration_s"] = (
+            stop_pts["end_time"] - stop_pts["start_time"]
+        ).dt.total_seconds()
+        parent_id_type = type(stops.trajectories[-1].parent.id)
+        stop_pts["traj_id"] = stop_pts["traj_id"].astype(parent_id_type)
         return stop_pts